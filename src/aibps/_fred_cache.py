@@ -0,0 +1,175 @@
+# src/aibps/_fred_cache.py
+"""
+Local on-disk cache for FRED series.
+
+Every pipeline run used to re-download the same multi-decade series from
+FRED. Each fetched series is now persisted as a small Parquet file under
+data/cache/fred/, keyed by (series_id, observation_start), and reused for
+CACHE_TTL_SECONDS (24h) so warm reruns skip the network entirely.
+
+Set AIBPS_REFRESH=1 to bypass the cache and force re-fetching. If pyarrow is
+not installed, everything falls straight through to the live fetch.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from aibps._retry import retry_backoff
+
+try:
+    from fredapi import Fred
+except ImportError:
+    Fred = None
+
+CACHE_DIR = Path("data") / "cache" / "fred"
+CACHE_TTL_SECONDS = 24 * 3600
+
+
+@functools.lru_cache(maxsize=1)
+def get_fred_client():
+    """
+    Shared, process-wide Fred client.
+
+    Constructing a fresh Fred per call tears down the underlying HTTP
+    session, so every get_series re-does the TLS handshake. Cache a single
+    client so all fetchers reuse one keep-alive connection pool.
+
+    Returns None when fredapi is not installed or FRED_API_KEY is unset.
+    """
+    if Fred is None:
+        print("⚠️ fredapi not installed; cannot fetch from FRED.")
+        return None
+
+    key = os.getenv("FRED_API_KEY")
+    if not key:
+        print("⚠️ FRED_API_KEY not set; cannot fetch from FRED.")
+        return None
+
+    try:
+        client = Fred(api_key=key)
+    except Exception as e:
+        print(f"⚠️ Failed to initialize Fred: {e}")
+        return None
+
+    # Stock fredapi fetches via urllib and opens a fresh connection per
+    # call; forks/newer versions expose a requests session. When one is
+    # present, mount a pooled adapter so the threaded fan-out reuses
+    # keep-alive connections instead of re-handshaking TLS per series.
+    if hasattr(client, "session"):
+        try:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            sess = requests.Session()
+            sess.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+            client.session = sess
+        except Exception as e:
+            print(f"⚠️ Could not attach pooled session to Fred client: {e}")
+
+    return client
+
+try:
+    import pyarrow  # noqa: F401
+    _HAVE_PARQUET = True
+except ImportError:
+    _HAVE_PARQUET = False
+
+
+def _cache_path(sid: str, start: str | None) -> Path:
+    return CACHE_DIR / f"{sid}_{start if start else 'full'}.parquet"
+
+
+def _refresh_requested() -> bool:
+    return os.getenv("AIBPS_REFRESH", "").lower() in ("1", "true", "yes")
+
+
+# In-process memo on top of the disk cache: several pillar fetchers pull
+# the same FRED series (e.g. power/construction ids appear in both infra
+# modules), and within one pipeline process even a warm disk hit re-parses
+# Parquet. Identical (sid, start) requests are served from here instead.
+_MEMO: dict[tuple[str, str | None], pd.Series] = {}
+
+
+@retry_backoff()
+def _get_series_live(fred, sid: str, start: str | None) -> pd.Series:
+    """One live FRED round-trip; transient failures retry before raising."""
+    if start is not None:
+        return fred.get_series(sid, observation_start=start)
+    return fred.get_series(sid)
+
+
+def cached_get_series(fred, sid: str, start: str | None = None) -> pd.Series:
+    """
+    fred.get_series(sid[, observation_start=start]) with an in-process memo
+    in front of a transparent on-disk Parquet cache. Network errors retry
+    with backoff and then propagate to the caller exactly like a direct
+    get_series call would.
+    """
+    key = (sid, start)
+    if not _refresh_requested():
+        hit = _MEMO.get(key)
+        if hit is not None:
+            # Copy so callers that relabel the result can't alias the memo.
+            return hit.copy()
+
+    path = _cache_path(sid, start)
+    ser = None
+
+    if _HAVE_PARQUET and not _refresh_requested() and path.exists():
+        if time.time() - path.stat().st_mtime < CACHE_TTL_SECONDS:
+            try:
+                ser = pd.read_parquet(path).iloc[:, 0]
+            except Exception as e:
+                print(f"⚠️ Unreadable cache file {path}; re-fetching. ({e})")
+
+    if ser is None:
+        ser = _get_series_live(fred, sid, start)
+
+        if _HAVE_PARQUET and ser is not None and len(ser) > 0:
+            try:
+                CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                pd.Series(ser).to_frame(sid).to_parquet(path, compression="zstd")
+            except Exception as e:
+                print(f"⚠️ Could not cache {sid} to {path}: {e}")
+
+    if ser is not None and len(ser) > 0:
+        _MEMO[key] = pd.Series(ser)
+
+    return ser
+
+
+def fetch_many(
+    fred,
+    series_map: dict[str, str],
+    start: str | None = None,
+    max_workers: int = 8,
+) -> dict[str, pd.Series]:
+    """
+    Fetch several FRED series concurrently through cached_get_series.
+
+    series_map maps output label -> FRED series id. Each get_series call is
+    a blocking HTTPS round-trip, so the whole block completes in roughly one
+    round-trip instead of N; warm series come straight off the disk cache.
+    Failed series are reported and omitted, and the returned dict preserves
+    series_map order.
+    """
+    results: dict[str, pd.Series] = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(series_map))) as ex:
+        futures = {
+            ex.submit(cached_get_series, fred, sid, start): (label, sid)
+            for label, sid in series_map.items()
+        }
+        for fut in as_completed(futures):
+            label, sid = futures[fut]
+            try:
+                results[label] = fut.result()
+            except Exception as e:
+                print(f"⚠️ Failed to fetch {sid} ({label}): {e}")
+    return {label: results[label] for label in series_map if label in results}
@@ -0,0 +1,120 @@
+# src/aibps/_io.py
+"""
+I/O helpers for the data/processed/* pillar files.
+
+CSV stays the canonical interchange format — the Streamlit app reads it and
+the nightly workflow commits it — but re-parsing dates out of CSV on every
+compute run is slow. write_processed() therefore writes a zstd-compressed
+Parquet sibling next to each CSV, and read_processed() prefers the Parquet
+copy whenever it is at least as fresh as the CSV: typed columns, native
+DatetimeIndex, no parse_dates cost.
+
+Everything degrades to plain CSV when pyarrow is not installed.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+PROC_DIR = Path("data") / "processed"
+RAW_DIR = Path("data") / "raw"
+
+try:
+    import pyarrow  # noqa: F401
+    _HAVE_PARQUET = True
+except ImportError:
+    _HAVE_PARQUET = False
+
+
+def write_processed(
+    df: pd.DataFrame,
+    name: str,
+    index_label: str | None = None,
+    float_format: str = "%.4f",
+) -> Path:
+    """Write data/processed/<name>.csv plus a Parquet sibling; returns the CSV path."""
+    PROC_DIR.mkdir(parents=True, exist_ok=True)
+    csv_path = PROC_DIR / f"{name}.csv"
+    # chunksize streams rows through a bounded buffer instead of building
+    # one giant string for the whole frame.
+    df.to_csv(
+        csv_path, index_label=index_label, float_format=float_format,
+        chunksize=50_000,
+    )
+
+    if _HAVE_PARQUET:
+        try:
+            df.to_parquet(csv_path.with_suffix(".parquet"), compression="zstd")
+        except Exception as e:
+            print(f"⚠️ Could not write Parquet sibling for {name}: {e}")
+
+    return csv_path
+
+
+def write_raw(df: pd.DataFrame, name: str) -> Path:
+    """
+    Write data/raw/<name>.csv plus a Parquet sibling; returns the CSV path.
+
+    Same split as write_processed — the workflow commits the raw CSVs, so
+    they stay canonical, while the Parquet copy gives warm reruns a typed,
+    parse-free read. Raw values keep full float precision.
+    """
+    RAW_DIR.mkdir(parents=True, exist_ok=True)
+    csv_path = RAW_DIR / f"{name}.csv"
+    df.to_csv(csv_path, chunksize=50_000)
+
+    if _HAVE_PARQUET:
+        try:
+            df.to_parquet(csv_path.with_suffix(".parquet"), compression="zstd")
+        except Exception as e:
+            print(f"⚠️ Could not write Parquet sibling for raw {name}: {e}")
+
+    return csv_path
+
+
+def read_processed(name: str) -> pd.DataFrame | None:
+    """
+    Read data/processed/<name>: the Parquet sibling if it is at least as
+    fresh as the CSV AND carries the CSV's columns, else the CSV. Returns
+    None when neither file exists.
+    """
+    csv_path = PROC_DIR / f"{name}.csv"
+    pq_path = csv_path.with_suffix(".parquet")
+
+    # Sniff the CSV header once: it drives the float32 schema below and
+    # doubles as the validity check for the Parquet sibling.
+    cols = None
+    if csv_path.exists():
+        cols = pd.read_csv(csv_path, nrows=0, index_col=0).columns
+
+    if _HAVE_PARQUET and pq_path.exists():
+        if cols is None or pq_path.stat().st_mtime >= csv_path.stat().st_mtime:
+            try:
+                df = pd.read_parquet(pq_path)
+                # The sibling is untracked while the CSV is the committed,
+                # canonical copy — and two fetchers share the
+                # market_processed stem with different schemas, so mtime
+                # order alone (which copies/archives may not preserve) is
+                # not enough to trust it. Only use the Parquet when its
+                # columns match the CSV header.
+                if cols is None or list(df.columns) == list(cols):
+                    return df
+                print(f"⚠️ {pq_path} columns do not match the CSV; using the CSV.")
+            except Exception as e:
+                print(f"⚠️ Unreadable {pq_path}; falling back to CSV. ({e})")
+
+    if cols is None:
+        return None
+
+    # Read with an explicit float32 schema so the C parser coerces values
+    # in a single pass (no per-column cleanup after).
+    try:
+        return pd.read_csv(
+            csv_path, index_col=0, parse_dates=True,
+            dtype={c: "float32" for c in cols},
+        )
+    except (ValueError, TypeError):
+        # Non-numeric column snuck in; fall back to inferred dtypes.
+        return pd.read_csv(csv_path, index_col=0, parse_dates=True)
@@ -0,0 +1,227 @@
+# src/aibps/_pct_rank.py
+"""
+Shared percentile-rank kernels.
+
+fetch_market_safe and normalize each grew their own rolling-rank
+implementation; this module holds the single optimized copy of each so the
+numba kernels compile (and disk-cache) once and every caller gets the same
+semantics:
+
+- roll_pct_rank_nan: NaN-aware rank of the last value per rolling window,
+  positional windows over the raw (possibly NaN-holed) array.
+- roll_pct_rank_dense: rank of the last value per rolling window on a dense
+  (NaN-free) array, via an incrementally sorted window buffer.
+- expanding_rank: expanding average-rank percentile for pandas builds
+  without expanding().rank — an incremental sorted-buffer kernel, with
+  expanding_rank_numpy's vectorized pairwise pass as the no-numba twin.
+
+All ranks use average-rank tie handling scaled to 0–100, matching
+rank(pct=True).iloc[-1] * 100. Everything works without numba; the jitted
+kernels are used when available.
+"""
+
+from __future__ import annotations
+
+import bisect
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Optional JIT accelerator; everything works without it.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    # Explicit signatures compile the kernels eagerly at import (then hit the
+    # on-disk cache), instead of deferring type inference to the first call.
+    @njit("float64[:](float64[:], int64, int64)", cache=True)
+    def _roll_pct_nan_kernel(vals, window, min_periods):  # pragma: no cover - compiled
+        # Incrementally sorted buffer of the window's VALID values: evicting
+        # the outgoing value and inserting the incoming one are binary
+        # searches plus a short memmove, and the rank is two more binary
+        # searches — instead of rescanning all `window` values per step.
+        n = vals.size
+        out = np.full(n, np.nan)
+        buf = np.empty(window, dtype=np.float64)
+        size = 0
+        for i in range(n):
+            if i >= window:
+                old = vals[i - window]
+                if not np.isnan(old):
+                    pos = np.searchsorted(buf[:size], old)
+                    for k in range(pos, size - 1):
+                        buf[k] = buf[k + 1]
+                    size -= 1
+            v = vals[i]
+            if np.isnan(v):
+                continue
+            pos = np.searchsorted(buf[:size], v)
+            for k in range(size, pos, -1):
+                buf[k] = buf[k - 1]
+            buf[pos] = v
+            size += 1
+            if size >= min_periods:
+                lt = np.searchsorted(buf[:size], v)
+                eq = np.searchsorted(buf[:size], v, side="right") - lt
+                out[i] = (lt + 0.5 * (eq + 1.0)) / size * 100.0
+        return out
+
+    @njit("float64[:](float64[:])", cache=True)
+    def _expanding_rank_kernel(vals):  # pragma: no cover - compiled
+        # Same sorted-buffer idea as the rolling kernels, minus eviction:
+        # O(n log n) searches (plus the insert memmoves) instead of the
+        # O(n²) pairwise-comparison fallback.
+        n = vals.size
+        out = np.empty(n, dtype=np.float64)
+        buf = np.empty(n, dtype=np.float64)
+        size = 0
+        for i in range(n):
+            v = vals[i]
+            pos = np.searchsorted(buf[:size], v)
+            for k in range(size, pos, -1):
+                buf[k] = buf[k - 1]
+            buf[pos] = v
+            size += 1
+            eq = np.searchsorted(buf[:size], v, side="right") - pos
+            out[i] = (pos + 0.5 * (eq + 1.0)) / size * 100.0
+        return out
+
+    @njit("float64[:](float64[:], int64, int64)", cache=True)
+    def _roll_rank_dense_kernel(vals, window, min_periods):  # pragma: no cover - compiled
+        # Incrementally sorted window buffer: binary-search insert/evict per
+        # step plus two searchsorted rank queries, instead of rescanning all
+        # `window` values for every output.
+        n = vals.size
+        out = np.full(n, np.nan)
+        buf = np.empty(window, dtype=np.float64)
+        size = 0
+        for i in range(n):
+            v = vals[i]
+            if i >= window:
+                old = vals[i - window]
+                pos = np.searchsorted(buf[:size], old)
+                for k in range(pos, size - 1):
+                    buf[k] = buf[k + 1]
+                size -= 1
+            pos = np.searchsorted(buf[:size], v)
+            for k in range(size, pos, -1):
+                buf[k] = buf[k - 1]
+            buf[pos] = v
+            size += 1
+            if size >= min_periods:
+                lt = np.searchsorted(buf[:size], v)
+                eq = np.searchsorted(buf[:size], v, side="right") - lt
+                out[i] = (lt + 0.5 * (eq + 1.0)) / size * 100.0
+        return out
+else:
+    _roll_pct_nan_kernel = None
+    _expanding_rank_kernel = None
+    _roll_rank_dense_kernel = None
+
+
+def roll_pct_rank_nan(vals: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    """NaN-aware percentile rank (0–100) of the last value in each window.
+
+    Ranks are computed in float64 but returned as float32: bounded [0, 100]
+    values need nowhere near double precision, and the narrower dtype halves
+    the downstream frame and CSV/Parquet footprint.
+    """
+    vals = np.ascontiguousarray(vals, dtype=np.float64)
+    n = vals.size
+
+    if _roll_pct_nan_kernel is not None:
+        return _roll_pct_nan_kernel(vals, window, min_periods).astype(np.float32)
+
+    # Mid-tier: pandas >= 1.4 ships a Cython rolling rank with the same
+    # positional-window, NaN-aware, average-tie semantics — one native call
+    # instead of the O(n·window) NumPy comparison fallback below.
+    roller = pd.Series(vals).rolling(window, min_periods=min_periods)
+    if hasattr(roller, "rank"):
+        core = roller.rank(pct=True) * 100.0
+        return core.to_numpy(dtype=np.float32)
+
+    out = np.full(n, np.nan)
+
+    # Head: windows still shorter than `window` observations
+    for i in range(min(window - 1, n)):
+        w = vals[: i + 1]
+        valid = ~np.isnan(w)
+        n_valid = int(valid.sum())
+        if n_valid < min_periods or np.isnan(w[-1]):
+            continue
+        lt = int((w[valid] < w[-1]).sum())
+        eq = int((w[valid] == w[-1]).sum())
+        out[i] = (lt + 0.5 * (eq + 1.0)) / n_valid * 100.0
+
+    # Body: full windows, all at once
+    if n >= window:
+        wins = sliding_window_view(vals, window)
+        last = wins[:, -1]
+        valid = ~np.isnan(wins)
+        n_valid = valid.sum(axis=1)
+        lt = ((wins < last[:, None]) & valid).sum(axis=1)
+        eq = ((wins == last[:, None]) & valid).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = (lt + 0.5 * (eq + 1.0)) / n_valid * 100.0
+        ok = (n_valid >= min_periods) & ~np.isnan(last)
+        out[window - 1:] = np.where(ok, pct, np.nan)
+
+    return out.astype(np.float32)
+
+
+def _roll_rank_sorted_py(vals: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    """Pure-Python twin of _roll_rank_dense_kernel: bisect-maintained window."""
+    n = len(vals)
+    out = np.full(n, np.nan)
+    buf: list[float] = []
+    for i in range(n):
+        v = vals[i]
+        if i >= window:
+            del buf[bisect.bisect_left(buf, vals[i - window])]
+        bisect.insort(buf, v)
+        cnt = len(buf)
+        if cnt >= min_periods:
+            lt = bisect.bisect_left(buf, v)
+            eq = bisect.bisect_right(buf, v) - lt
+            out[i] = (lt + 0.5 * (eq + 1.0)) / cnt * 100.0
+    return out
+
+
+def roll_pct_rank_dense(vals: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    """Percentile rank (0–100) of the last value per window on NaN-free input.
+
+    Returned as float32, like roll_pct_rank_nan.
+    """
+    vals = np.ascontiguousarray(vals, dtype=np.float64)
+    fn = _roll_rank_dense_kernel if _roll_rank_dense_kernel is not None else _roll_rank_sorted_py
+    return fn(vals, window, min_periods).astype(np.float32)
+
+
+def expanding_rank(vals: np.ndarray) -> np.ndarray:
+    """
+    Expanding average-rank percentile (0–100) on dense (NaN-free) input:
+    the jitted incremental sorted-buffer kernel when numba is available,
+    else the vectorized O(n²) NumPy pass.
+    """
+    vals = np.ascontiguousarray(vals, dtype=np.float64)
+    if _expanding_rank_kernel is not None:
+        return _expanding_rank_kernel(vals)
+    return expanding_rank_numpy(vals)
+
+
+def expanding_rank_numpy(vals: np.ndarray) -> np.ndarray:
+    """
+    Expanding average-rank percentile (0–100) of each value vs. its prefix,
+    as one vectorized pairwise-comparison pass: O(n²) memory/FLOPs but no
+    Python-level loop, fine for the few thousand monthly rows seen here.
+    """
+    vals = np.ascontiguousarray(vals, dtype=np.float64)
+    n = vals.size
+    tril = np.tril(np.ones((n, n), dtype=bool))  # j <= i
+    lt = ((vals[None, :] < vals[:, None]) & tril).sum(axis=1)
+    eq = ((vals[None, :] == vals[:, None]) & tril).sum(axis=1)
+    return (lt + 0.5 * (eq + 1.0)) / np.arange(1, n + 1) * 100.0
@@ -0,0 +1,43 @@
+# src/aibps/_retry.py
+"""
+Retry-with-backoff for flaky network calls.
+
+FRED and Yahoo both throw transient errors (rate limits, connection
+resets) that a bare per-call try/except turns into silently empty
+columns; downstream that means NaN propagation and shorter fallback
+windows, and usually a full pipeline re-run. A couple of spaced retries
+recovers most of these, so the raw download calls are wrapped in
+retry_backoff while callers keep their existing final except as the
+real failure path.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+
+
+def retry_backoff(attempts: int = 3, base_delay: float = 1.0):
+    """
+    Decorator: retry the wrapped call up to `attempts` times, sleeping
+    with exponential backoff (base_delay, 2x, 4x, ...) between tries.
+    The final failure is re-raised unchanged so existing error handling
+    around the call keeps working.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(1, attempts + 1):
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    if attempt == attempts:
+                        raise
+                    delay = base_delay * 2 ** (attempt - 1)
+                    print(
+                        f"⚠️ {fn.__name__} failed (attempt {attempt}/{attempts}): {e}; "
+                        f"retrying in {delay:.0f}s"
+                    )
+                    time.sleep(delay)
+        return wrapper
+    return decorate
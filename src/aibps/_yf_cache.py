@@ -0,0 +1,66 @@
+# src/aibps/_yf_cache.py
+"""
+Local on-disk cache for yfinance daily closes.
+
+Every run of the market fetchers re-downloaded full price history from
+Yahoo even when nothing changed. Each ticker's daily Close is now persisted
+as a small Parquet file under data/cache/yf/, keyed by
+(ticker, start, today's date) — the date in the key means the cache
+naturally expires overnight without TTL bookkeeping, and repeated runs
+within a day skip the network entirely.
+
+Set AIBPS_REFRESH=1 to bypass the cache and force re-downloading. If
+pyarrow is not installed, everything falls straight through to the live
+fetch.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    _HAVE_PARQUET = True
+except ImportError:
+    _HAVE_PARQUET = False
+
+CACHE_DIR = Path("data") / "cache" / "yf"
+
+
+def _cache_path(ticker: str, start: str | None) -> Path:
+    safe = ticker.replace("^", "_").replace("/", "_")
+    return CACHE_DIR / f"{safe}_{start if start else 'full'}_{date.today()}.parquet"
+
+
+def _refresh_requested() -> bool:
+    return os.getenv("AIBPS_REFRESH", "").lower() in ("1", "true", "yes")
+
+
+def load_cached_close(ticker: str, start: str | None) -> pd.Series | None:
+    """Return today's cached daily Close for (ticker, start), or None."""
+    if not _HAVE_PARQUET or _refresh_requested():
+        return None
+    path = _cache_path(ticker, start)
+    if not path.exists():
+        return None
+    try:
+        return pd.read_parquet(path).iloc[:, 0].rename(ticker)
+    except Exception as e:
+        print(f"⚠️ Unreadable yf cache file {path}; re-downloading. ({e})")
+        return None
+
+
+def store_cached_close(ticker: str, start: str | None, close: pd.Series) -> None:
+    """Persist a ticker's daily Close under today's cache key (best effort)."""
+    if not _HAVE_PARQUET or close is None or len(close) == 0:
+        return
+    path = _cache_path(ticker, start)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        pd.Series(close).to_frame("Close").to_parquet(path, compression="zstd")
+    except Exception as e:
+        print(f"⚠️ Could not cache {ticker} to {path}: {e}")
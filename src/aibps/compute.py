@@ -42,19 +42,65 @@ if SRC_ROOT not in sys.path:
     sys.path.insert(0, SRC_ROOT)
 
 from aibps.normalize import normalize_series  # noqa: E402
+from aibps._io import read_processed, write_processed  # noqa: E402
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 PROC_DIR = os.path.join("data", "processed")
 OUT_PATH = os.path.join(PROC_DIR, "aibps_monthly.csv")
 CONFIG_PATH = os.path.join(HERE, "config.yaml")
 
 
+if njit is not None:
+    @njit(cache=True)
+    def _composite_kernel(arr, w):
+        """
+        Fused AIBPS + AIBPS_RA: one typed loop over the aligned (N, K)
+        pillar matrix emits the NaN-aware weighted mean (>=2 pillars
+        required) and its trailing 3-month mean, with no intermediate
+        mask/cumsum arrays between the two stages.
+        """
+        n, k = arr.shape
+        aibps = np.full(n, np.nan)
+        ra = np.full(n, np.nan)
+        for i in range(n):
+            num = 0.0
+            den = 0.0
+            present = 0
+            for j in range(k):
+                v = arr[i, j]
+                if not np.isnan(v):
+                    num += v * w[j]
+                    den += w[j]
+                    present += 1
+            if present >= 2 and den > 0.0:
+                aibps[i] = num / den
+            s = 0.0
+            c = 0
+            lo = i - 2 if i >= 2 else 0
+            for j in range(lo, i + 1):
+                x = aibps[j]
+                if not np.isnan(x):
+                    s += x
+                    c += 1
+            if c > 0:
+                ra[i] = s / c
+        return aibps, ra
+else:
+    _composite_kernel = None
+
+
 def _read_processed(filename: str) -> pd.DataFrame | None:
-    path = os.path.join(PROC_DIR, filename)
-    if not os.path.exists(path):
-        print(f"ℹ️ {filename} missing.")
-        return None
+    stem = filename[:-4] if filename.endswith(".csv") else filename
     try:
-        df = pd.read_csv(path, index_col=0, parse_dates=True).sort_index()
+        df = read_processed(stem)
+        if df is None:
+            print(f"ℹ️ {filename} missing.")
+            return None
+        df = df.sort_index()
         if df.empty:
             print(f"ℹ️ {filename} exists but is empty.")
             return None
@@ -264,34 +310,45 @@ def main():
     print(weights)
 
     vals = base[normalized_pillars]
-
-    # Build a weight matrix aligned to vals
-    weight_vec = weights.reindex(normalized_pillars)
-    weight_matrix = pd.DataFrame(
-        np.broadcast_to(weight_vec.values, (len(vals), len(weight_vec))),
-        index=vals.index,
-        columns=normalized_pillars,
-    )
-
-    # Only count weights where we actually have data
-    effective_weights = weight_matrix.where(vals.notna())
-    weighted_vals = vals * effective_weights
-
-    weighted_sum = weighted_vals.sum(axis=1, skipna=True)
-    total_w = effective_weights.sum(axis=1)
-
-    composite = weighted_sum / total_w
-    composite[total_w == 0] = np.nan  # if no pillars, mark as NaN
-
-    # Require at least 2 pillars to define AIBPS
-    num_pillars_available = vals.notna().sum(axis=1)
-    composite[num_pillars_available < 2] = np.nan
-
-    base["AIBPS"] = composite
-    base["AIBPS_RA"] = base["AIBPS"].rolling(3, min_periods=1).mean()
+    arr = np.ascontiguousarray(vals.to_numpy(dtype=np.float64))
+    w_vec = weights.reindex(normalized_pillars).to_numpy()
+
+    if _composite_kernel is not None:
+        composite, ra = _composite_kernel(arr, w_vec)
+        base["AIBPS"] = composite
+        base["AIBPS_RA"] = ra
+    else:
+        # NaN-aware weighted mean as one matrix-vector product: mask missing
+        # pillars, dot both values and the availability mask with the weight
+        # vector, and renormalize — no broadcasted weight-matrix temporaries.
+        mask = np.isnan(arr)
+        num = np.where(mask, 0.0, arr) @ w_vec
+        denom = (~mask).astype(np.float64) @ w_vec
+        with np.errstate(invalid="ignore", divide="ignore"):
+            composite = np.where(denom > 0, num / denom, np.nan)
+
+        # Require at least 2 pillars to define AIBPS
+        composite[(~mask).sum(axis=1) < 2] = np.nan
+
+        base["AIBPS"] = composite
+
+        # 3-month rolling mean via cumulative sums: one cumsum + one shift +
+        # one division instead of the pandas window machinery. NaN-aware so it
+        # matches rolling(3, min_periods=1).mean() exactly.
+        v = base["AIBPS"].to_numpy(dtype=float)
+        cs = np.cumsum(np.where(np.isnan(v), 0.0, v))
+        cnt = np.cumsum(~np.isnan(v)).astype(float)
+        cs_lag = np.zeros_like(cs)
+        cnt_lag = np.zeros_like(cnt)
+        if len(v) > 3:
+            cs_lag[3:] = cs[:-3]
+            cnt_lag[3:] = cnt[:-3]
+        nobs = cnt - cnt_lag
+        with np.errstate(invalid="ignore"):
+            base["AIBPS_RA"] = np.where(nobs > 0, (cs - cs_lag) / nobs, np.nan)
 
     # Drop rows where composite is NaN
-    out = base.dropna(subset=["AIBPS"], how="all")
+    out = base.dropna(subset=["AIBPS"])
 
     # ---- Debug tail: last 6 rows for key series ----
     print("---- Columns in composite ----")
@@ -309,8 +366,7 @@ def main():
         _safe_tail(col)
 
     # ---- Write out ----
-    os.makedirs(PROC_DIR, exist_ok=True)
-    out.to_csv(OUT_PATH)
+    write_processed(out, "aibps_monthly")
     print(f"💾 Wrote {OUT_PATH} with pillars: {normalized_pillars} (rows={len(out)})")
 
 
@@ -39,14 +39,18 @@ Output:
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import pandas as pd
 
-# fredapi is required for this script
-try:
-    from fredapi import Fred
-except ImportError:
-    Fred = None
+# Ensure we can import aibps helpers when running as a script
+HERE = os.path.dirname(__file__)                       # .../src/aibps
+SRC_ROOT = os.path.abspath(os.path.join(HERE, ".."))   # .../src
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from aibps._fred_cache import cached_get_series, get_fred_client as _shared_fred  # noqa: E402
+from aibps._io import write_processed  # noqa: E402
 
 # ---------------------------------------------------------------------
 # Configuration
@@ -87,57 +91,74 @@ CONNECTIVITY_SERIES = [
 # ---------------------------------------------------------------------
 
 def get_fred_client():
-    """Instantiate a Fred client from FRED_API_KEY, or return None if unavailable."""
-    if Fred is None:
-        print("❌ fredapi is not installed. Install it in your environment.")
-        return None
+    """Return the shared process-wide Fred client, or None if unavailable."""
+    return _shared_fred()
 
-    key = os.getenv("FRED_API_KEY")
-    if not key:
-        print("⚠️ FRED_API_KEY not set; cannot fetch Adoption data from FRED.")
-        return None
 
-    try:
-        fred = Fred(api_key=key)
-        return fred
-    except Exception as e:
-        print(f"❌ Failed to initialize Fred client: {e}")
-        return None
+def fetch_all_series(fred, blocks):
+    """
+    Fetch every configured series across all blocks through ONE thread pool.
 
+    `blocks` maps block label -> list of (fred_id, column_name) pairs. The
+    four blocks used to fan out one at a time, so the pipeline paid four
+    sequential rounds of network latency; a single pool over all ten series
+    finishes in roughly one round-trip total.
 
-def fetch_series_block(fred, pairs, label):
+    Returns a dict of column_name -> cleaned Series (failures omitted).
+    """
+    jobs = [(sid, colname, label) for label, pairs in blocks.items() for sid, colname in pairs]
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as ex:
+        futures = {
+            ex.submit(cached_get_series, fred, sid): (sid, colname, label)
+            for sid, colname, label in jobs
+        }
+        for fut in as_completed(futures):
+            sid, colname, label = futures[fut]
+            try:
+                ser = fut.result()
+                if ser is None or len(ser) == 0:
+                    print(f"⚠️ Block={label}: empty or missing series {sid} ({colname}); skipping.")
+                    continue
+                s = pd.Series(ser, name=colname).astype("float32")
+                if not isinstance(s.index, pd.DatetimeIndex):
+                    s.index = pd.to_datetime(s.index)
+                s = s.sort_index()
+                results[colname] = s
+                print(
+                    f"✅ Block={label}: fetched {sid} → {colname} "
+                    f"({s.index.min().date()} → {s.index.max().date()}, n={len(s)})"
+                )
+            except Exception as e:
+                print(f"⚠️ Block={label}: failed fetching {sid} ({colname}): {e}")
+    return results
+
+
+def build_series_block(results, pairs, label):
     """
-    Fetch a block of FRED series and return a DataFrame with datetime index.
+    Assemble one block's DataFrame from the pre-fetched series dict.
 
     Each pair in `pairs` is (fred_id, column_name).
 
     Returns:
         DataFrame with columns named per column_name; may be empty if everything fails.
     """
-    frames = []
-
-    for sid, colname in pairs:
-        try:
-            ser = fred.get_series(sid)
-            if ser is None or len(ser) == 0:
-                print(f"⚠️ Block={label}: empty or missing series {sid} ({colname}); skipping.")
-                continue
-            s = pd.Series(ser, name=colname)
-            s.index = pd.to_datetime(s.index)
-            s = s.sort_index()
-            frames.append(s)
-            print(
-                f"✅ Block={label}: fetched {sid} → {colname} "
-                f"({s.index.min().date()} → {s.index.max().date()}, n={len(s)})"
-            )
-        except Exception as e:
-            print(f"⚠️ Block={label}: failed fetching {sid} ({colname}): {e}")
+    # Keep the configured column order regardless of completion order
+    frames = [results[colname] for _, colname in pairs if colname in results]
 
     if not frames:
         print(f"⚠️ Block={label}: no usable series; returning empty DataFrame.")
         return pd.DataFrame()
 
-    df = pd.concat(frames, axis=1).sort_index()
+    # Build the union index once and assign each series into a preallocated
+    # frame, instead of letting pd.concat outer-join N indexes pairwise.
+    union_idx = frames[0].index
+    for s in frames[1:]:
+        union_idx = union_idx.union(s.index)
+
+    df = pd.DataFrame(index=union_idx)
+    for s in frames:
+        df[s.name] = s.reindex(union_idx)
     return df
 
 
@@ -205,11 +226,19 @@ def main():
         print(f"💾 Wrote empty {OUT_PATH} (no FRED client).")
         return 0
 
-    # ---- Fetch blocks ----
-    ent_block   = fetch_series_block(fred, ENTERPRISE_SERIES,    "Enterprise_Software")
-    cloud_block = fetch_series_block(fred, CLOUD_SERIES,         "Cloud_Services")
-    labor_block = fetch_series_block(fred, DIGITAL_LABOR_SERIES, "Digital_Labor")
-    conn_block  = fetch_series_block(fred, CONNECTIVITY_SERIES,  "Connectivity")
+    # ---- Fetch every series across all blocks in one concurrent pass ----
+    blocks = {
+        "Enterprise_Software": ENTERPRISE_SERIES,
+        "Cloud_Services":      CLOUD_SERIES,
+        "Digital_Labor":       DIGITAL_LABOR_SERIES,
+        "Connectivity":        CONNECTIVITY_SERIES,
+    }
+    fetched = fetch_all_series(fred, blocks)
+
+    ent_block   = build_series_block(fetched, ENTERPRISE_SERIES,    "Enterprise_Software")
+    cloud_block = build_series_block(fetched, CLOUD_SERIES,         "Cloud_Services")
+    labor_block = build_series_block(fetched, DIGITAL_LABOR_SERIES, "Digital_Labor")
+    conn_block  = build_series_block(fetched, CONNECTIVITY_SERIES,  "Connectivity")
 
     # ---- Build composites ----
     ent_idx   = block_to_composite(ent_block,   "Adoption_Enterprise_Software")
@@ -267,8 +296,7 @@ def main():
     print(combined_m.tail(12))
 
     # ---- Write output ----
-    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
-    combined_m.to_csv(OUT_PATH, index_label="Date")
+    write_processed(combined_m, "adoption_processed", index_label="Date")
     print(
         f"💾 Wrote {OUT_PATH} with {len(combined_m)} rows and columns: "
         f"{list(combined_m.columns)}"
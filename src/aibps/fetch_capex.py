@@ -2,11 +2,21 @@
 from __future__ import annotations
 
 import os
+import sys
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+# Ensure we can import aibps helpers when running as a script
+HERE = os.path.dirname(__file__)                       # .../src/aibps
+SRC_ROOT = os.path.abspath(os.path.join(HERE, ".."))   # .../src
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from aibps._fred_cache import fetch_many, get_fred_client  # noqa: E402
+from aibps._io import write_processed  # noqa: E402
+
 
 DATA_DIR = Path("data")
 PROC_OUT = DATA_DIR / "processed" / "capex_processed.csv"
@@ -34,34 +44,45 @@ def _to_monthly(s: pd.Series) -> pd.Series:
     monthly frequency via forward fill, starting at START.
     """
     s = pd.Series(s).sort_index()
-    s.index = pd.to_datetime(s.index)
+    if not isinstance(s.index, pd.DatetimeIndex):
+        s.index = pd.to_datetime(s.index)
     s.index.name = "date"
-    s = s.resample("M").ffill()
+    # Already month-end monthly? Then the resample would be a full-length
+    # no-op pass; only quarterly/annual (and month-start) series need it.
+    freq = pd.infer_freq(s.index) if len(s) >= 3 else None
+    if freq not in ("M", "ME"):
+        # Broadcast onto an explicit month-end grid: reindex(ffill) fills
+        # straight to the target points without resample's bin machinery.
+        month_idx = pd.date_range(s.index.min(), s.index.max() + pd.offsets.MonthEnd(0), freq="M")
+        s = s.reindex(month_idx, method="ffill")
     s = s[s.index >= pd.to_datetime(START)]
-    return s
+    return s.astype(np.float32)
 
 
-def _rebase_100(s: pd.Series) -> pd.Series:
+def _rebase_100(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Rebase a series so that its first non-NaN value = 100.
+    Rebase every column so that its first non-NaN value = 100, in a single
+    vectorized pass (first-valid lookup via argmax on the NaN mask + one
+    broadcast division, instead of a per-column apply).
+
+    Columns with no usable baseline (all-NaN, zero, or non-finite first
+    value) come back all-NaN.
     """
-    if not s.notna().any():
-        return s * np.nan
-    first = s.dropna().iloc[0]
-    if not np.isfinite(first) or first == 0:
-        return s * np.nan
-    return (s / first) * 100.0
+    arr = df.to_numpy(dtype=float)
+    valid = ~np.isnan(arr)
+    first_pos = np.argmax(valid, axis=0)
+    first_vals = arr[first_pos, np.arange(arr.shape[1])]
+    ok = valid.any(axis=0) & np.isfinite(first_vals) & (first_vals != 0)
+    first_vals = np.where(ok, first_vals, np.nan)
+    return pd.DataFrame(arr / first_vals * 100.0, index=df.index, columns=df.columns)
 
 
 def main():
-    key = os.getenv("FRED_API_KEY")
-    if not key:
-        print("⚠️ No FRED_API_KEY — cannot fetch Capex data.")
+    fred = get_fred_client()
+    if fred is None:
+        print("⚠️ No FRED client — cannot fetch Capex data.")
         return
 
-    from fredapi import Fred
-    fred = Fred(api_key=key)
-
     series_map = {
         "Capex_PNFI": PNFI,
         "Capex_UNXANO": UNXANO,
@@ -72,26 +93,21 @@ def main():
         "Capex_Semicon_CapUtil": SEMICON_CAPUTIL,
     }
 
-    frames = {}
-    for label, sid in series_map.items():
-        try:
-            raw = fred.get_series(sid, observation_start=START)
-            monthly = _to_monthly(raw)
-            frames[label] = monthly
-        except Exception as e:
-            print(f"⚠️ Failed to fetch {sid} ({label}): {e}")
+    # Fetch all series concurrently — each call is a blocking HTTPS round-trip
+    raw = fetch_many(fred, series_map, START)
+    frames = {label: _to_monthly(ser) for label, ser in raw.items()}
 
     if not frames:
         print("❌ No Capex series fetched; not writing file.")
         return
 
-    # Combine to wide DataFrame
-    df = pd.concat(frames.values(), axis=1)
-    df.columns = list(frames.keys())
+    # Combine to wide DataFrame: one union-index alignment via the dict
+    # constructor instead of concat's pairwise reindexing.
+    df = pd.DataFrame(frames)
     df.index.name = "date"
 
     # Rebase each component to 100
-    rebased = df.apply(_rebase_100)
+    rebased = _rebase_100(df)
     rebased_cols = [f"{c}_idx" for c in rebased.columns]
     rebased.columns = rebased_cols
 
@@ -102,8 +118,7 @@ def main():
     out = pd.concat([composite, rebased, df.add_suffix("_raw")], axis=1)
     out = out.dropna(how="all")
 
-    PROC_OUT.parent.mkdir(parents=True, exist_ok=True)
-    out.to_csv(PROC_OUT)
+    write_processed(out, "capex_processed")
 
     print("---- Capex composite tail ----")
     print(out[["Capex_Supply"]].tail(6))
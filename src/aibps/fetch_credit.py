@@ -2,11 +2,21 @@
 from __future__ import annotations
 
 import os
+import sys
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+# Ensure we can import aibps helpers when running as a script
+HERE = os.path.dirname(__file__)                       # .../src/aibps
+SRC_ROOT = os.path.abspath(os.path.join(HERE, ".."))   # .../src
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from aibps._fred_cache import fetch_many, get_fred_client  # noqa: E402
+from aibps._io import write_processed  # noqa: E402
+
 
 DATA_DIR = Path("data")
 PROC_OUT = DATA_DIR / "processed" / "credit_fred_processed.csv"
@@ -21,35 +31,38 @@ START = "1980-01-01"
 
 def _to_monthly(s: pd.Series) -> pd.Series:
     s = s.sort_index()
-    s.index = pd.to_datetime(s.index)
+    if not isinstance(s.index, pd.DatetimeIndex):
+        s.index = pd.to_datetime(s.index)
     s.index.name = "date"
-    return s.resample("M").last()
+    # Skip the resample when the series is already month-end monthly
+    freq = pd.infer_freq(s.index) if len(s) >= 3 else None
+    if freq in ("M", "ME"):
+        return s
+    # groupby-period beats resample("M") here and never materializes
+    # empty-month bins.
+    return s.groupby(s.index.to_period("M").to_timestamp("M")).last()
 
 
 def main():
-    key = os.getenv("FRED_API_KEY")
-    if not key:
-        print("⚠️ No FRED_API_KEY — cannot fetch credit series.")
+    fred = get_fred_client()
+    if fred is None:
+        print("⚠️ No FRED client — cannot fetch credit series.")
         return
 
-    from fredapi import Fred
-    fred = Fred(api_key=key)
+    # Fetch raw series concurrently (each is a blocking HTTPS round-trip)
+    raw = fetch_many(fred, {sid: sid for sid in (AAA, BAA, HY_OAS)}, START)
+    if len(raw) < 3:
+        print("⚠️ FRED fetch failed for credit series.")
+        return
 
-    def get_series(sid: str) -> pd.Series:
-        s = fred.get_series(sid, observation_start=START)
-        s = pd.Series(s, name=sid).sort_index()
-        s.index = pd.to_datetime(s.index)
+    def tidy(sid: str) -> pd.Series:
+        s = pd.Series(raw[sid], name=sid).sort_index().astype(np.float32)
+        if not isinstance(s.index, pd.DatetimeIndex):
+            s.index = pd.to_datetime(s.index)
         s.index.name = "date"
         return s
 
-    # Fetch raw series
-    try:
-        aaa = get_series(AAA)
-        baa = get_series(BAA)
-        hy = get_series(HY_OAS)
-    except Exception as e:
-        print(f"⚠️ FRED fetch failed for credit series: {e}")
-        return
+    aaa, baa, hy = tidy(AAA), tidy(BAA), tidy(HY_OAS)
 
     # Convert to monthly
     aaa_m = _to_monthly(aaa).rename("AAA_yield")
@@ -59,15 +72,21 @@ def main():
     # Baa - Aaa spread in percentage points
     spread = (baa_m - aaa_m).rename("BAA_AAA_spread_pct")
 
-    df = pd.concat([aaa_m, baa_m, spread, hy_m], axis=1).dropna(how="all")
+    df = pd.DataFrame(
+        {
+            "AAA_yield": aaa_m,
+            "BAA_yield": baa_m,
+            "BAA_AAA_spread_pct": spread,
+            "HY_OAS_bp": hy_m,
+        }
+    ).dropna(how="all")
     df.index.name = "date"
 
     if df.empty:
         print("⚠️ No combined credit data to write.")
         return
 
-    PROC_OUT.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(PROC_OUT)
+    write_processed(df, "credit_fred_processed")
 
     print("---- credit_fred_processed tail ----")
     print(df.tail(6))
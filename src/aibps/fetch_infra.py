@@ -26,13 +26,26 @@ Output:
       - Infra         (alias for Infra_Supply, for backward compatibility)
 """
 
+import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+# Ensure we can import aibps helpers when running as a script
+HERE = os.path.dirname(__file__)                       # .../src/aibps
+SRC_ROOT = os.path.abspath(os.path.join(HERE, ".."))   # .../src
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from aibps._fred_cache import cached_get_series, get_fred_client as _shared_fred  # noqa: E402
+from aibps._io import write_processed  # noqa: E402
+
+log = logging.getLogger(__name__)
+
 PROC_DIR = Path("data") / "processed"
 OUT_PATH = PROC_DIR / "infra_processed.csv"
 
@@ -75,24 +88,8 @@ MATERIALS_SERIES = {
 
 
 def get_fred():
-    """Instantiate Fred client if API key exists, else return None."""
-    key = os.getenv("FRED_API_KEY")
-    if not key:
-        print("⚠️ No FRED_API_KEY set; cannot fetch Infra data from FRED.")
-        return None
-
-    try:
-        from fredapi import Fred  # type: ignore
-    except ImportError:
-        print("⚠️ fredapi not installed; cannot fetch from FRED.")
-        return None
-
-    try:
-        fred = Fred(api_key=key)
-        return fred
-    except Exception as e:
-        print(f"⚠️ Failed to initialize Fred: {e}")
-        return None
+    """Return the shared process-wide Fred client, or None if unavailable."""
+    return _shared_fred()
 
 
 def fetch_fred_block(fred, series_map, label: str) -> pd.DataFrame | None:
@@ -102,79 +99,138 @@ def fetch_fred_block(fred, series_map, label: str) -> pd.DataFrame | None:
     Returns a DataFrame with monthly index and columns named per series_map.
     """
     if fred is None:
-        print(f"ℹ️ No FRED client; skipping {label} block.")
+        log.info("ℹ️ No FRED client; skipping %s block.", label)
         return None
 
-    frames = []
+    # Fan the blocking get_series round-trips out across threads; the GIL
+    # is released during socket I/O, so the block takes about as long as
+    # its slowest single request.
+    raw: dict[str, pd.Series] = {}
+    with ThreadPoolExecutor(max_workers=min(8, len(series_map))) as ex:
+        futures = {
+            ex.submit(cached_get_series, fred, sid): (sid, col_name)
+            for sid, col_name in series_map.items()
+        }
+        for fut in as_completed(futures):
+            sid, col_name = futures[fut]
+            try:
+                ser = fut.result()
+                if ser is None or len(ser) == 0:
+                    log.warning("⚠️ FRED returned empty for %s (%s); skipping.", sid, col_name)
+                    continue
+                raw[col_name] = ser
+            except Exception as e:
+                log.warning("⚠️ Failed to fetch %s (%s) [%s]: %s", sid, col_name, label, e)
+
+    # Align all series on the union index in one DataFrame construction,
+    # then resample to monthly once — instead of a per-series
+    # to_frame/resample plus a concat that re-aligns the monthly grids.
+    series_dict: dict[str, pd.Series] = {}
     for sid, col_name in series_map.items():
-        try:
-            ser = fred.get_series(sid)
-            if ser is None or len(ser) == 0:
-                print(f"⚠️ FRED returned empty for {sid} ({col_name}); skipping.")
-                continue
-            df = ser.to_frame(name=col_name)
-            df.index = pd.to_datetime(df.index)
-            df = df.sort_index()
-            df_m = df.resample("M").ffill()
-            frames.append(df_m)
-            print(
-                f"✅ FRED {sid} → {col_name} [{label}]: "
-                f"{df_m.index.min().date()} to {df_m.index.max().date()}"
+        if col_name not in raw:
+            continue
+        ser = pd.Series(raw[col_name]).sort_index()
+        if not isinstance(ser.index, pd.DatetimeIndex):
+            ser.index = pd.to_datetime(ser.index)
+        series_dict[col_name] = ser
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                "✅ FRED %s → %s [%s]: %s to %s",
+                sid, col_name, label, ser.index.min().date(), ser.index.max().date(),
             )
-        except Exception as e:
-            print(f"⚠️ Failed to fetch {sid} ({col_name}) [{label}]: {e}")
 
-    if not frames:
-        print(f"⚠️ No series fetched for {label} block.")
+    if not series_dict:
+        log.warning("⚠️ No series fetched for %s block.", label)
         return None
 
-    combined = pd.concat(frames, axis=1).sort_index()
-    combined = combined.dropna(how="all")
+    # Broadcast onto one shared month-end grid, but fill PER COLUMN:
+    # quarterly/annual series are stamped on period starts, so after union
+    # alignment they are NaN on most monthly rows, and a row-wise fill on
+    # the combined frame (reindex method= or a combined resample) never
+    # recovers them. Series.reindex(method="ffill") carries each column's
+    # own last observation forward — NaN observations included, exactly
+    # like the per-series resample("M").ffill() — and the where() masks
+    # months past each series' final observation so a series that ends
+    # early is not extended flat to the block's end. The frames then share
+    # one identical index, so the DataFrame build needs no alignment.
+    start = min(ser.index.min() for ser in series_dict.values())
+    end = max(ser.index.max() for ser in series_dict.values())
+    month_idx = pd.date_range(start, end + pd.offsets.MonthEnd(0), freq="M")
+    monthly = {
+        col: ser.reindex(month_idx, method="ffill").where(
+            month_idx <= ser.index.max() + pd.offsets.MonthEnd(0)
+        )
+        for col, ser in series_dict.items()
+    }
+    combined = pd.DataFrame(monthly).dropna(how="all")
     return combined
 
 
 def scale_to_index(series: pd.Series, baseline_date: pd.Timestamp, name: str) -> pd.Series:
     """Scale a series so that baseline_date (or first valid) ≈ 100."""
-    s = series.copy()
+    # Work on the raw arrays: one searchsorted on the (sorted) index beats
+    # the hashed `in` + .loc lookups, and the division stays in NumPy.
+    arr = series.to_numpy(dtype=float)
+    idx = series.index.values.astype("datetime64[ns]")
+    target = np.datetime64(baseline_date, "ns")
 
     baseline_val = np.nan
-    if baseline_date in s.index and not pd.isna(s.loc[baseline_date]):
-        baseline_val = s.loc[baseline_date]
-        print(f"🔧 {name}: baseline {baseline_date.date()} value={baseline_val:.3f}")
+    pos = np.searchsorted(idx, target)
+    if pos < len(idx) and idx[pos] == target and not np.isnan(arr[pos]):
+        baseline_val = arr[pos]
+        log.debug("🔧 %s: baseline %s value=%.3f", name, baseline_date.date(), baseline_val)
     else:
-        first_idx = s.first_valid_index()
-        if first_idx is not None:
-            baseline_val = s.loc[first_idx]
-            print(f"🔧 {name}: using first valid {first_idx.date()} value={baseline_val:.3f} as baseline")
+        valid = ~np.isnan(arr)
+        if valid.any():
+            first = int(np.argmax(valid))
+            baseline_val = arr[first]
+            log.debug(
+                "🔧 %s: using first valid %s value=%.3f as baseline",
+                name, series.index[first].date(), baseline_val,
+            )
         else:
-            print(f"⚠️ {name}: no valid values; returning unscaled.")
-            return s
+            log.warning("⚠️ %s: no valid values; returning unscaled.", name)
+            return series.copy()
 
     if baseline_val == 0 or np.isnan(baseline_val):
-        print(f"⚠️ {name}: invalid baseline; returning unscaled.")
-        return s
+        log.warning("⚠️ %s: invalid baseline; returning unscaled.", name)
+        return series.copy()
 
-    out = (s / baseline_val) * 100.0
-    out.name = name
-    return out
+    return pd.Series(arr / baseline_val * 100.0, index=series.index, name=name)
 
 
 def build_block_index(df: pd.DataFrame, name: str) -> pd.Series:
-    """Scale each column to an index and average into a composite."""
+    """Scale each column to an index and average into a composite.
+
+    Vectorized across columns: one baseline row + one broadcast division,
+    instead of calling scale_to_index per column in a Python loop.
+    """
     if df is None or df.empty:
         return pd.Series(dtype=float, name=name)
 
-    tmp = df.copy()
-    for col in tmp.columns:
-        tmp[col] = scale_to_index(tmp[col], BASELINE_DATE, col)
+    # Baseline per column: value at BASELINE_DATE, else first valid value.
+    first_valid = df.bfill().iloc[0]
+    if BASELINE_DATE in df.index:
+        base = df.loc[BASELINE_DATE].where(df.loc[BASELINE_DATE].notna(), first_valid)
+    else:
+        base = first_valid
+
+    # Columns with no usable baseline (all-NaN or zero) stay unscaled,
+    # matching scale_to_index behaviour.
+    base = base.where(base.notna() & (base != 0))
+    scaled = df.div(base, axis=1).mul(100.0)
+    invalid = base.isna()
+    if invalid.any():
+        scaled.loc[:, invalid] = df.loc[:, invalid]
 
-    idx = tmp.mean(axis=1)
+    idx = scaled.mean(axis=1)
     idx.name = name
-    print(f"✅ Built composite index {name} from columns: {list(tmp.columns)}")
+    log.debug("✅ Built composite index %s from columns: %s", name, list(df.columns))
     return idx
 
 
 def main():
+    logging.basicConfig(level=os.getenv("AIBPS_LOG", "INFO").upper(), format="%(message)s")
     PROC_DIR.mkdir(parents=True, exist_ok=True)
 
     fred = get_fred()
@@ -217,7 +273,7 @@ def main():
             "Infra_Power_Grid", "Infra_Construction", "Infra_Semi_Equip",
             "Infra_Materials", "Infra_Supply", "Infra"
         ])
-        df.to_csv(OUT_PATH, index_label="Date")
+        write_processed(df, "infra_processed", index_label="Date")
         print(f"💾 Wrote empty {OUT_PATH}")
         return 0
 
@@ -226,12 +282,9 @@ def main():
     idx_max = max(s.index.max() for s in non_empty)
     monthly_idx = pd.date_range(idx_min, idx_max, freq="M")
 
-    df = pd.DataFrame(index=monthly_idx)
-
-    for s in series_list:
-        if s is None or s.empty:
-            continue
-        df = df.join(s, how="left")
+    # Reindex every sub-pillar to the shared monthly index in one concat,
+    # rather than re-hashing the index on a per-series join loop.
+    df = pd.concat([s.reindex(monthly_idx) for s in non_empty], axis=1)
 
     # Composite Infra_Supply from available sub-pillars
     component_cols = [
@@ -259,7 +312,7 @@ def main():
     print("---- Tail of infra_processed.csv ----")
     print(df.tail(10))
 
-    df.to_csv(OUT_PATH, index_label="Date")
+    write_processed(df, "infra_processed", index_label="Date")
     print(f"💾 Wrote {OUT_PATH} with columns: {list(df.columns)} (rows={len(df)})")
     return 0
 
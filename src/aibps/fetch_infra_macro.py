@@ -1,12 +1,25 @@
 # src/aibps/fetch_infra_macro.py
 from __future__ import annotations
 
+import logging
 import os
+import sys
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+# Ensure we can import aibps helpers when running as a script
+HERE = os.path.dirname(__file__)                       # .../src/aibps
+SRC_ROOT = os.path.abspath(os.path.join(HERE, ".."))   # .../src
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from aibps._fred_cache import cached_get_series, get_fred_client  # noqa: E402
+from aibps._io import write_processed  # noqa: E402
+
+
+log = logging.getLogger(__name__)
 
 DATA_DIR = Path("data")
 PROC_OUT = DATA_DIR / "processed" / "infra_macro_processed.csv"
@@ -27,53 +40,63 @@ def _to_monthly(s: pd.Series) -> pd.Series:
     end-of-month monthly frequency via forward-fill.
     """
     s = pd.Series(s).sort_index()
-    s.index = pd.to_datetime(s.index)
+    if not isinstance(s.index, pd.DatetimeIndex):
+        s.index = pd.to_datetime(s.index)
     s.index.name = "date"
-    # Resample to monthly and forward-fill
-    s = s.resample("M").ffill()
+    # Resample to monthly and forward-fill — unless the series is already
+    # month-end monthly, in which case the resample is a full no-op pass.
+    freq = pd.infer_freq(s.index) if len(s) >= 3 else None
+    if freq not in ("M", "ME"):
+        # Broadcast onto an explicit month-end grid: reindex(ffill) fills
+        # straight to the target points without resample's bin machinery.
+        month_idx = pd.date_range(s.index.min(), s.index.max() + pd.offsets.MonthEnd(0), freq="M")
+        s = s.reindex(month_idx, method="ffill")
     # Trim to START
     s = s[s.index >= pd.to_datetime(START)]
     return s
 
 
-def _rebase_100(s: pd.Series) -> pd.Series:
-    """Rebase series so first non-NaN value = 100."""
-    if not s.notna().any():
-        return s * np.nan
-    first = s.dropna().iloc[0]
-    if not np.isfinite(first) or first == 0:
-        return s * np.nan
-    return (s / first) * 100.0
+def _rebase_100(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rebase every column so first non-NaN value = 100, in one vectorized pass.
+    Columns with no usable baseline come back all-NaN.
+    """
+    arr = df.to_numpy(dtype=float)
+    valid = ~np.isnan(arr)
+    first_pos = np.argmax(valid, axis=0)
+    first_vals = arr[first_pos, np.arange(arr.shape[1])]
+    ok = valid.any(axis=0) & np.isfinite(first_vals) & (first_vals != 0)
+    first_vals = np.where(ok, first_vals, np.nan)
+    return pd.DataFrame(arr / first_vals * 100.0, index=df.index, columns=df.columns)
 
 
 def main():
-    key = os.getenv("FRED_API_KEY")
-    if not key:
-        print("⚠️ No FRED_API_KEY — cannot fetch Infra macro data.")
+    logging.basicConfig(level=os.getenv("AIBPS_LOG", "INFO").upper(), format="%(message)s")
+    fred = get_fred_client()
+    if fred is None:
+        print("⚠️ No FRED client — cannot fetch Infra macro data.")
         return
 
-    from fredapi import Fred
-    fred = Fred(api_key=key)
-
     frames = {}
     for label, sid in INFRA_SERIES.items():
         try:
-            raw = fred.get_series(sid, observation_start=START)
+            raw = cached_get_series(fred, sid, START)
             monthly = _to_monthly(raw)
             frames[label] = monthly
         except Exception as e:
-            print(f"⚠️ Failed to fetch {sid} ({label}): {e}")
+            log.warning("⚠️ Failed to fetch %s (%s): %s", sid, label, e)
 
     if not frames:
         print("❌ No Infra series fetched; not writing file.")
         return
 
-    df = pd.concat(frames.values(), axis=1)
-    df.columns = list(frames.keys())
+    # Single dict-constructor build: one union-index alignment instead of
+    # concat's pairwise reindexing.
+    df = pd.DataFrame(frames)
     df.index.name = "date"
 
     # Rebase each component to 100
-    rebased = df.apply(_rebase_100)
+    rebased = _rebase_100(df)
     rebased_cols = [f"{c}_idx" for c in rebased.columns]
     rebased.columns = rebased_cols
 
@@ -83,8 +106,7 @@ def main():
     out = pd.concat([composite, rebased, df.add_suffix("_raw")], axis=1)
     out = out.dropna(how="all")
 
-    PROC_OUT.parent.mkdir(parents=True, exist_ok=True)
-    out.to_csv(PROC_OUT)
+    write_processed(out, "infra_macro_processed")
 
     print("---- Infra macro composite tail ----")
     print(out[["Infra"]].tail(6))
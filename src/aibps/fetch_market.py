@@ -1,6 +1,10 @@
 # src/aibps/fetch_market.py
 from __future__ import annotations
 
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List
 
@@ -8,6 +12,18 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 
+# Ensure we can import aibps helpers when running as a script
+HERE = os.path.dirname(__file__)                       # .../src/aibps
+SRC_ROOT = os.path.abspath(os.path.join(HERE, ".."))   # .../src
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from aibps._io import write_processed, write_raw  # noqa: E402
+from aibps._retry import retry_backoff  # noqa: E402
+from aibps._yf_cache import load_cached_close, store_cached_close  # noqa: E402
+
+log = logging.getLogger(__name__)
+
 DATA_DIR = Path("data")
 RAW_OUT = DATA_DIR / "raw" / "market_prices.csv"
 PROC_OUT = DATA_DIR / "processed" / "market_processed.csv"
@@ -24,53 +40,117 @@ START = "1980-01-01"
 TICKERS: List[str] = ["^GSPC", "^IXIC", "^NDX", "QQQ", "ARKK"]
 
 
-def _fetch_one(ticker: str, start: str) -> pd.Series | None:
-    """Fetch one ticker's adjusted close as a monthly series."""
-    try:
-        df = yf.download(ticker, start=start, auto_adjust=True, progress=False)
-    except Exception as e:
-        print(f"⚠️ yfinance exception for {ticker}: {e}")
-        return None
-
-    if df is None or df.empty or "Close" not in df.columns:
-        print(f"⚠️ Empty/invalid data for {ticker}; skipping.")
-        return None
-
-    s = df["Close"].copy()
-    s.index = pd.to_datetime(s.index)
+def _monthly_close(s: pd.Series, ticker: str) -> pd.Series | None:
+    """Daily closes -> last close of each month, named after the ticker."""
+    # float32 is plenty for rebased index levels and halves memory traffic.
+    s = s.astype(np.float32)
+    # yf.download already returns a DatetimeIndex; only reparse if needed.
+    if not isinstance(s.index, pd.DatetimeIndex):
+        s.index = pd.to_datetime(s.index)
     s.index.name = "date"
 
-    # Monthly: last close of each month
-    s = s.resample("M").last().dropna()
+    # groupby-period beats resample("M") here and never materializes
+    # empty-month bins.
+    s = s.groupby(s.index.to_period("M").to_timestamp("M")).last().dropna()
 
     if s.empty:
-        print(f"⚠️ No monthly data for {ticker} after resample; skipping.")
+        log.warning("⚠️ No monthly data for %s after resample; skipping.", ticker)
         return None
 
     s.name = ticker
     return s
 
 
-def _rebase_100(s: pd.Series) -> pd.Series:
-    s = s.sort_index()
-    if not s.notna().any():
-        return s * np.nan
-    first = s.dropna().iloc[0]
-    if not np.isfinite(first) or first == 0:
-        return s * np.nan
-    return (s / first) * 100.0
+@retry_backoff()
+def _download(tickers, start: str, **kwargs):
+    """One yf.download round-trip; transient failures retry before raising."""
+    return yf.download(tickers, start=start, auto_adjust=True, progress=False, **kwargs)
+
+
+def _fetch_one(ticker: str, start: str) -> pd.Series | None:
+    """Fetch one ticker's adjusted close as a monthly series."""
+    cached = load_cached_close(ticker, start)
+    if cached is not None:
+        return _monthly_close(cached, ticker)
+
+    try:
+        df = _download(ticker, start)
+    except Exception as e:
+        log.warning("⚠️ yfinance exception for %s: %s", ticker, e)
+        return None
+
+    if df is None or df.empty or "Close" not in df.columns:
+        log.warning("⚠️ Empty/invalid data for %s; skipping.", ticker)
+        return None
+
+    store_cached_close(ticker, start, df["Close"])
+    return _monthly_close(df["Close"], ticker)
+
+
+def _fetch_batch(tickers: List[str], start: str) -> dict[str, pd.Series]:
+    """
+    Fetch all tickers in ONE yf.download call: a single session and one
+    internal HTTP pool instead of per-ticker session setup. Returns a dict
+    of ticker -> monthly Series; tickers that came back empty are omitted
+    so the caller can retry them individually.
+    """
+    # Serve today's cache hits first; only the misses go to Yahoo.
+    out: dict[str, pd.Series] = {}
+    todo: List[str] = []
+    for t in tickers:
+        cached = load_cached_close(t, start)
+        m = _monthly_close(cached, t) if cached is not None else None
+        if m is not None:
+            out[t] = m
+        else:
+            todo.append(t)
+
+    if not todo:
+        return out
+
+    try:
+        raw = _download(todo, start, group_by="ticker", threads=True)
+    except Exception as e:
+        log.warning("⚠️ Batched yfinance download failed: %s", e)
+        return out
+
+    if raw is None or raw.empty:
+        return out
+
+    for t in todo:
+        try:
+            s = raw[t]["Close"] if isinstance(raw.columns, pd.MultiIndex) else raw["Close"]
+        except KeyError:
+            continue
+        # Drop the NaN rows the batch frame holds for dates where only the
+        # other tickers traded, so the cached series matches a single fetch.
+        s = s.dropna()
+        if s.empty:
+            continue
+        m = _monthly_close(s, t)
+        if m is not None:
+            store_cached_close(t, start, s)
+            out[t] = m
+    return out
 
 
 def main():
+    logging.basicConfig(level=os.getenv("AIBPS_LOG", "INFO").upper(), format="%(message)s")
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     RAW_OUT.parent.mkdir(parents=True, exist_ok=True)
     PROC_OUT.parent.mkdir(parents=True, exist_ok=True)
 
-    frames: List[pd.Series] = []
-    for t in TICKERS:
-        s = _fetch_one(t, START)
-        if s is not None:
-            frames.append(s)
+    # One batched download for all tickers; anything it misses is retried
+    # through the threaded per-ticker path (ex.map preserves order).
+    fetched = _fetch_batch(TICKERS, START)
+    missing = [t for t in TICKERS if t not in fetched]
+    if missing:
+        log.warning("⚠️ Retrying %s individually after batch download.", missing)
+        with ThreadPoolExecutor(max_workers=len(missing)) as ex:
+            for t, s in zip(missing, ex.map(lambda t: _fetch_one(t, START), missing)):
+                if s is not None:
+                    fetched[t] = s
+    frames: List[pd.Series] = [fetched[t] for t in TICKERS if t in fetched]
 
     if not frames:
         print("❌ No market series fetched; aborting.")
@@ -80,29 +160,43 @@ def main():
     wide = pd.concat(frames, axis=1).sort_index()
     wide.index.name = "date"
 
-    # Persist raw multi-ticker panel for reference/debug
-    wide.to_csv(RAW_OUT)
+    # Persist raw multi-ticker panel for reference/debug (CSV + Parquet sibling)
+    write_raw(wide, "market_prices")
     print(f"💾 Wrote {RAW_OUT} with columns: {list(wide.columns)}")
     print(f"   Date span: {wide.index.min().date()} → {wide.index.max().date()}")
 
-    # Rebase each series to 100 at its own first valid point
-    rebased = wide.apply(_rebase_100)
-    # Give friendly column names for debug
-    rename_map = {col: f"Mkt_{col.replace('^', '')}_idx" for col in rebased.columns}
-    rebased = rebased.rename(columns=rename_map)
-
-    # Equal-weight composite of all rebased series
-    market_eqw = rebased.mean(axis=1, skipna=True).rename("Market")
+    # Rebase each series to 100 at its own first valid point AND average
+    # into the equal-weight composite in one fused NumPy pass: the rebased
+    # block is produced and reduced while still hot instead of walking the
+    # frame twice. Columns with no usable baseline come back all-NaN.
+    arr = wide.to_numpy(dtype=float)
+    valid = ~np.isnan(arr)
+    first_pos = np.argmax(valid, axis=0)
+    first_vals = arr[first_pos, np.arange(arr.shape[1])]
+    ok = valid.any(axis=0) & np.isfinite(first_vals) & (first_vals != 0)
+    first_vals = np.where(ok, first_vals, np.nan)
+    rebased_arr = arr / first_vals * 100.0
+    n_valid = (~np.isnan(rebased_arr)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        composite = np.nansum(rebased_arr, axis=1) / n_valid
+
+    # Friendly column names for debug
+    rebased = pd.DataFrame(
+        rebased_arr, index=wide.index,
+        columns=[f"Mkt_{col.replace('^', '')}_idx" for col in wide.columns],
+    )
+    market_eqw = pd.Series(composite, index=wide.index, name="Market")
 
     # Output: composite + underlying rebased components
-    out = pd.concat([market_eqw, rebased], axis=1).dropna(how="all")
+    # (the fused rebase above works in float64; store at float32 like other pillars)
+    out = pd.concat([market_eqw, rebased], axis=1).dropna(how="all").astype(np.float32)
     out.index.name = "date"
 
     print("---- Market composite tail (rebased EW) ----")
     print(out[["Market"]].tail(6))
     print(f"✅ Market composite span: {out.index.min().date()} → {out.index.max().date()}")
 
-    out.to_csv(PROC_OUT)
+    write_processed(out, "market_processed")
     print(f"💾 Wrote {PROC_OUT} (rows={len(out)}) with columns: {list(out.columns)}")
 
 
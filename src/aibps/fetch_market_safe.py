@@ -6,9 +6,22 @@
 # - outputs MKT_* columns used by compute.py
 
 import os, sys, time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pandas as pd
 
+# Ensure we can import aibps helpers when running as a script
+HERE = os.path.dirname(__file__)                       # .../src/aibps
+SRC_ROOT = os.path.abspath(os.path.join(HERE, ".."))   # .../src
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from aibps._io import write_processed, write_raw  # noqa: E402
+from aibps._pct_rank import roll_pct_rank_nan  # noqa: E402
+from aibps._retry import retry_backoff  # noqa: E402
+from aibps._yf_cache import load_cached_close, store_cached_close  # noqa: E402
+
 RAW_DIR = os.path.join("data","raw")
 PRO_DIR = os.path.join("data","processed")
 os.makedirs(RAW_DIR, exist_ok=True); os.makedirs(PRO_DIR, exist_ok=True)
@@ -17,71 +30,121 @@ START   = "2015-01-01"
 TICKERS = ["SOXX","QQQ"]
 
 def rolling_pct_rank(series: pd.Series, window: int) -> pd.Series:
-    def _rank_last(x):
-        s = pd.Series(x)
-        return float(s.rank(pct=True).iloc[-1] * 100.0)
-    return series.rolling(window, min_periods=max(24, window//4)).apply(_rank_last, raw=False)
+    """Percentile rank (0–100) of the last value in each rolling window.
+
+    Thin wrapper over the shared aibps._pct_rank kernel: a Numba-compiled
+    NaN-aware pass when numba is installed, else a vectorized NumPy
+    sliding-window fallback. Both match the old rolling().apply()
+    semantics, including NaN handling, min_periods, and average-rank ties.
+    """
+    min_periods = max(24, window // 4)
+    # dtype/contiguity coercion happens once at the kernel entry point.
+    out = roll_pct_rank_nan(series.to_numpy(), window, min_periods)
+    return pd.Series(out, index=series.index)
 
 def compute_percentiles(mon_12m: pd.DataFrame) -> pd.DataFrame:
-    out = pd.DataFrame(index=mon_12m.index)
-    for col in mon_12m.columns:
+    # Fill one preallocated float32 block and wrap it once at the end —
+    # assigning columns into a growing DataFrame re-consolidates its blocks
+    # on every insert.
+    cols = list(mon_12m.columns)
+    arr = np.empty((len(mon_12m), len(cols)), dtype=np.float32)
+    for j, col in enumerate(cols):
         s = mon_12m[col]
-        p120 = rolling_pct_rank(s, 120)
-        p60  = rolling_pct_rank(s, 60)
-        p36  = rolling_pct_rank(s, 36)
-        p = p120.fillna(p60).fillna(p36)
-        out[f"MKT_{col}_1y_pct"] = p
-    return out
+        p = rolling_pct_rank(s, 120).to_numpy()
+        for window in (60, 36):
+            fallback = rolling_pct_rank(s, window).to_numpy()
+            p = np.where(np.isnan(p), fallback, p)
+        arr[:, j] = p
+    return pd.DataFrame(
+        arr, index=mon_12m.index, columns=[f"MKT_{c}_1y_pct" for c in cols]
+    )
 
 def download_live():
     try:
         import yfinance as yf
-        frames = []
-        for t in TICKERS:
-            df = yf.download(t, start=START, auto_adjust=True, progress=False)
-            if df is None or df.empty or "Close" not in df:
-                print(f"⚠️ yfinance empty for {t}; skipping"); continue
-            s = df["Close"]
-            s.index = pd.to_datetime(s.index); s.index.name = "Date"
-            frames.append(s.to_frame(name=t))
-        if not frames:
-            return None
-        daily = pd.concat(frames, axis=1).sort_index()
-        daily.index.name = "Date"
-        return daily
     except Exception as e:
         print(f"⚠️ yfinance failed: {e}")
         return None
 
+    @retry_backoff()
+    def download(t):
+        """One yf.download round-trip; transient failures retry before raising."""
+        return yf.download(t, start=START, auto_adjust=True, progress=False)
+
+    def fetch_one(t):
+        s = load_cached_close(t, START)
+        if s is None:
+            try:
+                df = download(t)
+            except Exception as e:
+                print(f"⚠️ yfinance failed for {t}: {e}")
+                return None
+            if df is None or df.empty or "Close" not in df:
+                print(f"⚠️ yfinance empty for {t}; skipping"); return None
+            s = df["Close"]
+            store_cached_close(t, START, s)
+        if not isinstance(s.index, pd.DatetimeIndex):
+            s.index = pd.to_datetime(s.index)
+        s.index.name = "Date"
+        return s.to_frame(name=t)
+
+    # Downloads are network-latency-bound; fetch all tickers concurrently
+    # (ex.map keeps TICKERS order).
+    with ThreadPoolExecutor(max_workers=len(TICKERS)) as ex:
+        frames = [f for f in ex.map(fetch_one, TICKERS) if f is not None]
+    if not frames:
+        return None
+    daily = pd.concat(frames, axis=1).sort_index()
+    daily.index.name = "Date"
+    return daily
+
 def load_sample_or_generate():
     sample = os.path.join("data","sample","market_prices_sample.csv")
     if os.path.exists(sample):
         print(f"ℹ️ Using sample market file: {sample}")
         return pd.read_csv(sample, index_col=0, parse_dates=True).sort_index()
     idx = pd.date_range("2015-01-31","2025-12-31",freq="M")
-    soxx = np.linspace(100,400,len(idx)) + np.random.normal(0,10,len(idx))
-    qqq  = np.linspace( 90,380,len(idx)) + np.random.normal(0,10,len(idx))
+    # Seeded local generator: reruns are reproducible and the global
+    # np.random state is left untouched.
+    rng = np.random.default_rng(0)
+    soxx = np.linspace(100,400,len(idx)) + rng.normal(0,10,len(idx))
+    qqq  = np.linspace( 90,380,len(idx)) + rng.normal(0,10,len(idx))
     return pd.DataFrame({"SOXX":soxx,"QQQ":qqq}, index=idx)
 
 def main():
     print("MARKER fetch_market_safe.py — pandas", pd.__version__)
     t0 = time.time()
 
-    daily = download_live() or load_sample_or_generate()
-    daily = daily.sort_index()
+    # `download_live() or ...` would raise on a successful fetch — DataFrame
+    # truthiness is ambiguous — so the live path could never be taken.
+    daily = download_live()
+    if daily is None:
+        daily = load_sample_or_generate()
+    # float32 is plenty for prices feeding a 0–100 percentile and halves
+    # the bandwidth through the resample/pct_change/rank chain.
+    daily = daily.sort_index().astype(np.float32)
 
-    # Save raw daily
-    raw_path = os.path.join(RAW_DIR,"market_prices.csv")
-    daily.to_csv(raw_path)
+    # Save raw daily (CSV + Parquet sibling)
+    raw_path = str(write_raw(daily, "market_prices"))
     print(f"💾 raw → {raw_path}  rows={len(daily)}  cols={list(daily.columns)}")
 
-    # Month-end closes -> 12m change
-    monthly = daily.resample("M").last()
-    mon_12m = monthly.pct_change(12) * 100.0
+    # Keep only the ticker columns before resampling, so a sample file with
+    # extra columns doesn't inflate the working set of the monthly pass.
+    cols = [t for t in TICKERS if t in daily.columns]
+    if cols:
+        daily = daily[cols]
+
+    # Month-end closes -> 12m change. groupby-period beats resample("M")
+    # here and never materializes empty-month bins. fill_method=None skips
+    # pct_change's internal ffill scan (month-ends with no close stay NaN).
+    monthly = daily.groupby(daily.index.to_period("M").to_timestamp("M")).last()
+    # Drop the all-NaN 12-month warm-up rows before ranking; they add no
+    # valid observations to any window, so the percentiles are unchanged.
+    mon_12m = (monthly.pct_change(12, fill_method=None) * 100.0).dropna(how="all")
 
     out = compute_percentiles(mon_12m).dropna(how="all")
     pro_path = os.path.join(PRO_DIR,"market_processed.csv")
-    out.to_csv(pro_path)
+    write_processed(out, "market_processed")
     print(f"💾 processed → {pro_path}  rows={len(out)}  cols={list(out.columns)}")
     print(f"⏱  Done in {time.time()-t0:.2f}s")
 
@@ -31,12 +31,18 @@ Output:
 
 import os
 import sys
+
+import numpy as np
 import pandas as pd
 
-try:
-    from fredapi import Fred
-except ImportError:
-    Fred = None
+# Ensure we can import aibps helpers when running as a script
+HERE = os.path.dirname(__file__)                       # .../src/aibps
+SRC_ROOT = os.path.abspath(os.path.join(HERE, ".."))   # .../src
+if SRC_ROOT not in sys.path:
+    sys.path.insert(0, SRC_ROOT)
+
+from aibps._fred_cache import fetch_many, get_fred_client as _shared_fred  # noqa: E402
+from aibps._io import write_processed  # noqa: E402
 
 START_DATE = "1980-01-31"
 OUT_PATH = "data/processed/sentiment_processed.csv"
@@ -52,44 +58,28 @@ VIX_ID      = "VIXCLS"
 # ---------------------------------------------------------------------
 
 def get_fred_client():
-    """Instantiate a Fred client from FRED_API_KEY, or return None if unavailable."""
-    if Fred is None:
-        print("❌ fredapi is not installed. Install it in your environment.")
-        return None
-
-    key = os.getenv("FRED_API_KEY")
-    if not key:
-        print("⚠️ FRED_API_KEY not set; cannot fetch Sentiment data from FRED.")
-        return None
-
-    try:
-        return Fred(api_key=key)
-    except Exception as e:
-        print(f"❌ Failed to initialize Fred client: {e}")
-        return None
+    """Return the shared process-wide Fred client, or None if unavailable."""
+    return _shared_fred()
 
 
-def fetch_series(fred, sid, colname, label):
+def tidy_series(ser, sid, colname, label):
     """
-    Fetch a single FRED series and return as a one-column DataFrame with Date index.
+    Clean one already-fetched FRED series into a named, Date-indexed float32
+    Series (None when empty/failed) — no DataFrame round trip per series.
     """
-    try:
-        ser = fred.get_series(sid)
-        if ser is None or len(ser) == 0:
-            print(f"⚠️ {label}: empty or missing series {sid}; skipping.")
-            return pd.DataFrame()
+    if ser is None or len(ser) == 0:
+        print(f"⚠️ {label}: empty or missing series {sid}; skipping.")
+        return None
 
-        s = pd.Series(ser, name=colname)
+    s = pd.Series(ser, name=colname).astype("float32")
+    if not isinstance(s.index, pd.DatetimeIndex):
         s.index = pd.to_datetime(s.index)
-        s = s.sort_index()
-        print(
-            f"✅ {label}: fetched {sid} → {colname} "
-            f"({s.index.min().date()} → {s.index.max().date()}, n={len(s)})"
-        )
-        return s.to_frame()
-    except Exception as e:
-        print(f"⚠️ {label}: failed fetching {sid}: {e}")
-        return pd.DataFrame()
+    s = s.sort_index()
+    print(
+        f"✅ {label}: fetched {sid} → {colname} "
+        f"({s.index.min().date()} → {s.index.max().date()}, n={len(s)})"
+    )
+    return s
 
 
 def reindex_monthly(df, start_date):
@@ -114,22 +104,19 @@ def reindex_monthly(df, start_date):
     return monthly
 
 
-def z_standardize(series: pd.Series) -> pd.Series:
+def z_standardize(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Simple z-score standardization: (x - mean) / std.
-    Returns NaNs if std == 0 or series empty.
+    Simple z-score standardization per column: (x - mean) / std, for all
+    columns in one vectorized pass instead of a Python loop per series.
+    Columns with std == 0 (or no data) come back all-NaN.
     """
-    if series is None or series.empty:
-        return series
-
-    m = series.mean()
-    s = series.std()
-    if s == 0 or pd.isna(s):
-        return pd.Series(index=series.index, data=float("nan"), name=series.name)
+    if df is None or df.empty:
+        return df
 
-    z = (series - m) / s
-    z.name = series.name
-    return z
+    mu = df.mean()
+    sd = df.std()
+    sd = sd.where(sd.notna() & (sd != 0))
+    return df.sub(mu).div(sd)
 
 
 # ---------------------------------------------------------------------
@@ -146,13 +133,22 @@ def main():
         print(f"💾 Wrote empty {OUT_PATH} (no FRED client).")
         return 0
 
-    # --- Fetch individual series ---
-    cons_df = fetch_series(fred, CONSUMER_ID, "Sentiment_Consumer", "ConsumerSentiment")
-    epu_df  = fetch_series(fred, EPU_ID,      "Sentiment_EPU",      "EconomicPolicyUncertainty")
-    vix_df  = fetch_series(fred, VIX_ID,      "Sentiment_VIX",      "VIX")
+    # --- Fetch all three series in one concurrent batch ---
+    raw = fetch_many(
+        fred,
+        {
+            "Sentiment_Consumer": CONSUMER_ID,
+            "Sentiment_EPU": EPU_ID,
+            "Sentiment_VIX": VIX_ID,
+        },
+    )
+    cons = tidy_series(raw.get("Sentiment_Consumer"), CONSUMER_ID, "Sentiment_Consumer", "ConsumerSentiment")
+    epu  = tidy_series(raw.get("Sentiment_EPU"),      EPU_ID,      "Sentiment_EPU",      "EconomicPolicyUncertainty")
+    vix  = tidy_series(raw.get("Sentiment_VIX"),      VIX_ID,      "Sentiment_VIX",      "VIX")
 
-    # Combine and resample
-    combined = pd.concat([cons_df, epu_df, vix_df], axis=1).sort_index()
+    # Combine on the union index in one dict-constructor pass
+    parts = {s.name: s for s in [cons, epu, vix] if s is not None}
+    combined = pd.DataFrame(parts).sort_index()
 
     if combined.empty:
         print("⚠️ All Sentiment sub-series empty; writing empty sentiment_processed.csv.")
@@ -165,16 +161,21 @@ def main():
     monthly = reindex_monthly(combined, START_DATE)
 
     # Z-standardize each component before building composite
-    z_cols = {}
-    for cname in ["Sentiment_Consumer", "Sentiment_EPU", "Sentiment_VIX"]:
-        if cname in monthly.columns:
-            z_cols[cname] = z_standardize(monthly[cname])
-
-    if z_cols:
-        z_df = pd.concat(z_cols.values(), axis=1)
-        # Composite = mean of available z-scores
-        monthly["Sentiment"] = z_df.mean(axis=1)
-        print(f"✅ Sentiment composite constructed from z-scored components: {list(z_cols.keys())}")
+    z_names = [
+        c for c in ["Sentiment_Consumer", "Sentiment_EPU", "Sentiment_VIX"]
+        if c in monthly.columns
+    ]
+
+    if z_names:
+        z_df = z_standardize(monthly[z_names])
+        # Composite = mean of available z-scores, as one contiguous NumPy
+        # reduction (nansum / valid-count) on the underlying float32 block
+        # instead of pandas' row-wise reducer; all-NaN rows stay NaN.
+        vals = z_df.to_numpy(dtype=np.float32)
+        valid = (~np.isnan(vals)).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            monthly["Sentiment"] = np.nansum(vals, axis=1) / valid
+        print(f"✅ Sentiment composite constructed from z-scored components: {z_names}")
     else:
         monthly["Sentiment"] = float("nan")
         print("⚠️ No Sentiment components available; Sentiment is NaN.")
@@ -183,9 +184,8 @@ def main():
     print("---- Tail of sentiment_processed.csv ----")
     print(monthly.tail(12))
 
-    # Write output
-    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
-    monthly.to_csv(OUT_PATH, index_label="Date")
+    # Write output (CSV + Parquet sibling)
+    write_processed(monthly, "sentiment_processed", index_label="Date")
     print(
         f"💾 Wrote {OUT_PATH} with {len(monthly)} rows and columns: "
         f"{list(monthly.columns)}"
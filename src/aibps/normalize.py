@@ -22,6 +22,8 @@ from typing import Literal
 import numpy as np
 import pandas as pd
 
+from aibps._pct_rank import expanding_rank, roll_pct_rank_dense
+
 
 def _align_output(orig: pd.Series, core: pd.Series) -> pd.Series:
     """
@@ -47,17 +49,17 @@ def expanding_percentile(series: pd.Series) -> pd.Series:
     if s.empty:
         return series.astype(float) * np.nan
 
-    vals = []
-    idxs = []
-    for i in range(len(s)):
-        window = s.iloc[: i + 1]
-        pct = window.rank(pct=True).iloc[-1] * 100.0
-        vals.append(float(pct))
-        idxs.append(s.index[i])
-
-    core = pd.Series(vals, index=idxs)
-    core = core.clip(0.0, 100.0)
-    return _align_output(series, core)
+    # One expanding-rank pass in C instead of re-ranking every prefix
+    # (which was O(n² log n) with a fresh Series per step).
+    try:
+        arr = s.expanding(min_periods=1).rank(pct=True).to_numpy()
+        np.multiply(arr, 100.0, out=arr)
+    except AttributeError:
+        # pandas < 1.4 has no expanding rank; jitted/NumPy twin.
+        arr = expanding_rank(s.to_numpy())
+    # We own arr, so clip in place instead of allocating a clipped copy.
+    np.clip(arr, 0.0, 100.0, out=arr)
+    return _align_output(series, pd.Series(arr, index=s.index))
 
 
 def rolling_percentile(series: pd.Series, window: int = 60, min_periods: int | None = None) -> pd.Series:
@@ -74,13 +76,13 @@ def rolling_percentile(series: pd.Series, window: int = 60, min_periods: int | N
     if min_periods is None:
         min_periods = max(10, window // 4)
 
-    def _rank_last(x):
-        xx = pd.Series(x)
-        return float(xx.rank(pct=True).iloc[-1] * 100.0)
-
-    core = s.rolling(window=window, min_periods=min_periods).apply(_rank_last, raw=False)
-    core = core.clip(0.0, 100.0)
-    return _align_output(series, core)
+    # Shared kernel: jitted incremental sorted window when numba is
+    # available, else its bisect-based twin — both avoid per-window Series
+    # construction. dtype/contiguity coercion happens at the kernel entry.
+    arr = roll_pct_rank_dense(s.to_numpy(), window, min_periods)
+    # We own the kernel output, so clip in place instead of copying.
+    np.clip(arr, 0.0, 100.0, out=arr)
+    return _align_output(series, pd.Series(arr, index=s.index))
 
 
 def rolling_z(series: pd.Series, window: int = 24, min_periods: int | None = None) -> pd.Series: